@@ -0,0 +1,106 @@
+"""Kernels numéricos de LotteryAnalyzer.
+
+Se pueden compilar por adelantado con `python _kernels.py`, que genera el
+módulo de extensión `lottery_kernels`. Si no está disponible, los kernels
+se compilan con Numba la primera vez que se usan.
+"""
+import numpy as np
+from numba import njit, prange
+
+def _generate_predictions(frequent_picks, range_picks, range_offsets, max_number):
+    """Completa cada predicción con 2 números de los rangos ya sorteados.
+    
+    Recibe los sorteos ya hechos: 3 números frecuentes distintos por fila,
+    el rango de cada número restante y un valor en [0, 1) que elige la
+    posición dentro de los números libres del rango.
+    """
+    num_predictions = frequent_picks.shape[0]
+    regular = np.empty((num_predictions, 5), dtype=np.int8)
+    
+    for p in range(num_predictions):
+        # Incluir algunos números frecuentes
+        candidate_numbers = np.empty(5, dtype=np.int64)
+        candidate_numbers[:3] = frequent_picks[p]
+        
+        # Incluir números de diferentes rangos según distribución histórica
+        for k in range(3, 5):
+            range_idx = range_picks[p, k - 3]
+            min_val = range_idx * 11
+            max_val = min(max_number, (range_idx + 1) * 11 - 1)
+            
+            # Elegir uniformemente entre los números del rango aún no usados
+            taken = 0
+            for j in range(k):
+                if min_val <= candidate_numbers[j] <= max_val:
+                    taken += 1
+            skip = int(range_offsets[p, k - 3] * (max_val - min_val + 1 - taken))
+            for num in range(min_val, max_val + 1):
+                used = False
+                for j in range(k):
+                    if candidate_numbers[j] == num:
+                        used = True
+                if not used:
+                    if skip == 0:
+                        candidate_numbers[k] = num
+                        break
+                    skip -= 1
+                    
+        regular[p] = np.sort(candidate_numbers)
+        
+    return regular
+
+def _pattern_kernel(R, H, range_lut):
+    """Calcula en una sola pasada los patrones de cada fila de resultados.
+    
+    Devuelve la suma de los números regulares, la proporción de impares, la
+    distribución en rangos, si hay números consecutivos y si el número
+    caliente aparece entre los regulares.
+    """
+    n = R.shape[0]
+    sums = np.empty(n, dtype=np.int16)
+    odd_ratio = np.empty(n, dtype=np.float64)
+    range_dist = np.zeros((n, 4), dtype=np.int8)
+    consecutive = np.empty(n, dtype=np.bool_)
+    hot_corr = np.empty(n, dtype=np.bool_)
+    
+    for i in prange(n):
+        total = 0
+        odd = 0
+        has_consecutive = False
+        in_regular = False
+        for j in range(5):
+            num = R[i, j]
+            total += num
+            odd += num & 1
+            range_dist[i, range_lut[num]] += 1
+            # Las filas están ordenadas
+            if j > 0 and num - R[i, j - 1] == 1:
+                has_consecutive = True
+            if num == H[i]:
+                in_regular = True
+        sums[i] = total
+        odd_ratio[i] = odd / 5
+        consecutive[i] = has_consecutive
+        hot_corr[i] = in_regular
+        
+    return sums, odd_ratio, range_dist, consecutive, hot_corr
+
+# Kernels exportados al módulo compilado: nombre -> (función, firma)
+_EXPORTS = {
+    'generate_predictions': (_generate_predictions, 'i1[:,:](i8[:,:], i8[:,:], f8[:,:], i8)'),
+    'pattern_kernel': (_pattern_kernel, 'Tuple((i2[:], f8[:], i1[:,:], b1[:], b1[:]))(i1[:,:], i1[:], i1[:])'),
+}
+
+try:
+    from lottery_kernels import generate_predictions, pattern_kernel
+except ImportError:
+    generate_predictions = njit(cache=True)(_generate_predictions)
+    pattern_kernel = njit(cache=True, parallel=True)(_pattern_kernel)
+
+if __name__ == "__main__":
+    from numba.pycc import CC
+    
+    cc = CC('lottery_kernels')
+    for name, (func, signature) in _EXPORTS.items():
+        cc.export(name, signature)(func)
+    cc.compile()
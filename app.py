@@ -1,114 +1,168 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from collections import Counter
-import random
-import math
+from functools import lru_cache
 from itertools import combinations
+from _kernels import generate_predictions, pattern_kernel
+
+def _counts_to_counter(counts):
+    """Convierte un array de conteos en un Counter con los números que aparecen."""
+    return Counter({int(num): int(counts[num]) for num in np.flatnonzero(counts)})
+
+def _top_numbers(counts, k):
+    """Devuelve hasta k números con más apariciones, de mayor a menor frecuencia."""
+    # Los empates se ordenan por número, igual que Counter.most_common
+    k = min(k, np.count_nonzero(counts))
+    return np.argsort(-counts, kind='stable')[:k]
+
+@lru_cache(maxsize=128)
+def _enigma_table(shift, mod):
+    """Tabla del rotor: desplaza cada número de 0 a mod - 1 en `shift` posiciones."""
+    table = ((np.arange(mod) + shift) % mod).astype(np.int8)
+    table.flags.writeable = False  # Compartida entre llamadas
+    return table
 
 class LotteryAnalyzer:
     def __init__(self):
-        self.historical_results = []  # Lista de resultados históricos
         self.max_number = 43  # Número máximo para los 5 números principales
         self.hot_number_max = 16  # Número máximo para el número caliente
         
+        # Resultados históricos en arrays de NumPy (uno por campo)
+        self._n = 0  # Número de resultados almacenados
+        self._regular_buf = np.empty((16, 5), dtype=np.int8)
+        self._hot_buf = np.empty(16, dtype=np.int8)
+        
+        # Rango de cada número: 0-10, 11-21, 22-32, 33-43
+        self._range_lut = np.minimum(np.arange(self.max_number + 1) // 11, 3).astype(np.int8)
+        
+        # Conteos de frecuencia actualizados en cada add_result
+        self._regular_counts = np.zeros(self.max_number + 1, dtype=np.int64)
+        self._hot_counts = np.zeros(self.hot_number_max + 1, dtype=np.int64)
+        
+        # Resultados de los análisis, invalidados en cada add_result
+        self._freq_cache = None
+        self._pat_cache = None
+        self._enigma_cache = None
+        self._top_cache = None
+        
+        self._rng = np.random.default_rng()
+        
+    @property
+    def historical_results(self):
+        """Lista de resultados históricos como diccionarios."""
+        return [
+            {'regular': regular, 'hot': hot}
+            for regular, hot in zip(self._regular_arr.tolist(), self._hot_arr.tolist())
+        ]
+    
+    @property
+    def _regular_arr(self):
+        """Números regulares almacenados, con forma (N, 5)."""
+        return self._regular_buf[:self._n]
+    
+    @property
+    def _hot_arr(self):
+        """Números calientes almacenados, con forma (N,)."""
+        return self._hot_buf[:self._n]
+    
+    def _grow(self):
+        """Duplica la capacidad de los buffers cuando se llenan."""
+        capacity = 2 * len(self._hot_buf)
+        regular_buf = np.empty((capacity, 5), dtype=np.int8)
+        hot_buf = np.empty(capacity, dtype=np.int8)
+        regular_buf[:self._n] = self._regular_arr
+        hot_buf[:self._n] = self._hot_arr
+        self._regular_buf = regular_buf
+        self._hot_buf = hot_buf
+        
     def add_result(self, regular_numbers, hot_number):
         """Añade un resultado a los datos históricos."""
         if len(regular_numbers) != 5:
             raise ValueError("Se necesitan exactamente 5 números regulares")
         
-        # Validar rango de números regulares
+        # Validar rango de números regulares y marcar cada uno en una máscara de bits
+        seen = 0
         for num in regular_numbers:
             if num < 0 or num > self.max_number:
                 raise ValueError(f"Los números regulares deben estar entre 0 y {self.max_number}")
+            seen |= 1 << int(num)
         
         # Validar número caliente
         if hot_number < 1 or hot_number > self.hot_number_max:
             raise ValueError(f"El número caliente debe estar entre 1 y {self.hot_number_max}")
             
         # Verificar que no haya duplicados en números regulares
-        if len(set(regular_numbers)) != len(regular_numbers):
+        if seen.bit_count() != 5:
             raise ValueError("Los números regulares no deben repetirse")
             
-        self.historical_results.append({
-            'regular': sorted(regular_numbers),
-            'hot': hot_number
-        })
+        if self._n == len(self._hot_buf):
+            self._grow()
+        self._regular_buf[self._n] = sorted(regular_numbers)
+        self._hot_buf[self._n] = hot_number
+        
+        # Indexar con la fila ya guardada: admite listas, tuplas y arrays
+        self._regular_counts[self._regular_buf[self._n]] += 1
+        self._hot_counts[self._hot_buf[self._n]] += 1
+        self._n += 1
+        
+        self._freq_cache = None
+        self._pat_cache = None
+        self._enigma_cache = None
+        self._top_cache = None
         
     def analyze_frequency(self):
         """Analiza la frecuencia de aparición de números."""
-        regular_frequency = Counter()
-        hot_frequency = Counter()
-        
-        for result in self.historical_results:
-            regular_frequency.update(result['regular'])
-            hot_frequency.update([result['hot']])
+        if self._freq_cache is None:
+            self._freq_cache = {
+                'regular': _counts_to_counter(self._regular_counts),
+                'hot': _counts_to_counter(self._hot_counts)
+            }
             
-        return {
-            'regular': regular_frequency,
-            'hot': hot_frequency
-        }
+        # Copias, para que el llamador no pueda alterar la caché
+        return {key: Counter(counter) for key, counter in self._freq_cache.items()}
     
     def analyze_patterns(self):
         """Analiza patrones en los resultados."""
-        if len(self.historical_results) < 2:
+        if self._pat_cache is not None:
+            return dict(self._pat_cache)
+            
+        if self._n < 2:
             return "No hay suficientes datos para analizar patrones"
             
+        # Todos los patrones se calculan en una sola pasada sobre el histórico
+        sums, odd_ratio, range_dist, consecutive, hot_corr = pattern_kernel(
+            self._regular_arr, self._hot_arr, self._range_lut
+        )
+        
         patterns = {
-            'sum_regular': [],  # Suma de números regulares
-            'odd_even_ratio': [],  # Proporción de impares vs pares
-            'range_distribution': [],  # Distribución en rangos
-            'consecutive_numbers': [],  # Presencia de números consecutivos
-            'hot_correlation': []  # Correlación con número caliente
+            'sum_regular': sums,  # Suma de números regulares
+            'odd_even_ratio': odd_ratio,  # Proporción de impares vs pares
+            'range_distribution': range_dist,  # Distribución en rangos
+            'consecutive_numbers': consecutive,  # Presencia de números consecutivos
+            'hot_correlation': hot_corr  # Correlación con número caliente
         }
-        
-        for result in self.historical_results:
-            # Suma de números regulares
-            patterns['sum_regular'].append(sum(result['regular']))
-            
-            # Proporción de impares vs pares
-            odd_count = sum(1 for num in result['regular'] if num % 2 == 1)
-            patterns['odd_even_ratio'].append(odd_count / 5)
-            
-            # Distribución en rangos
-            ranges = [0, 0, 0, 0]  # 0-10, 11-21, 22-32, 33-43
-            for num in result['regular']:
-                ranges[min(3, num // 11)] += 1
-            patterns['range_distribution'].append(ranges)
-            
-            # Números consecutivos
-            has_consecutive = False
-            sorted_nums = sorted(result['regular'])
-            for i in range(len(sorted_nums) - 1):
-                if sorted_nums[i + 1] - sorted_nums[i] == 1:
-                    has_consecutive = True
-                    break
-            patterns['consecutive_numbers'].append(has_consecutive)
             
-            # Correlación con número caliente
-            in_regular = result['hot'] in result['regular']
-            patterns['hot_correlation'].append(in_regular)
+        # Los arrays se comparten entre llamadas
+        for values in patterns.values():
+            values.flags.writeable = False
             
-        return patterns
+        self._pat_cache = patterns
+        return dict(patterns)
     
     def chaos_theory_analysis(self):
         """Aplica conceptos básicos de teoría del caos para detectar comportamiento no lineal."""
-        if len(self.historical_results) < 3:
+        if self._n < 3:
             return "No hay suficientes datos para análisis de caos"
             
         # Análisis de Lyapunov simplificado
-        total_numbers = []
-        for result in self.historical_results:
-            total_numbers.extend(result['regular'])
-            total_numbers.append(result['hot'])
-            
-        differences = []
-        for i in range(1, len(total_numbers)):
-            differences.append(abs(total_numbers[i] - total_numbers[i-1]))
-            
-        if not differences:
-            return "No se pueden calcular diferencias"
-            
-        lyapunov_estimate = sum(math.log(abs(d)) if d != 0 else 0 for d in differences) / len(differences)
+        total_numbers = np.empty((self._n, 6), dtype=np.int16)
+        total_numbers[:, :5] = self._regular_arr
+        total_numbers[:, 5] = self._hot_arr
+        
+        differences = np.abs(np.diff(total_numbers.ravel()))
+        
+        # Las diferencias nulas aportan 0 a la suma
+        nonzero = differences[differences != 0]
+        lyapunov_estimate = float(np.log(nonzero, dtype=np.float64).sum() / differences.size)
         
         return {
             'lyapunov_estimate': lyapunov_estimate,
@@ -117,100 +171,78 @@ class LotteryAnalyzer:
         
     def enigma_inspired_analysis(self):
         """Análisis inspirado en el concepto de la máquina Enigma (rotación y sustitución)."""
-        if not self.historical_results:
+        if self._enigma_cache is not None:
+            return dict(self._enigma_cache)
+            
+        if self._n == 0:
             return "No hay datos para analizar"
             
         # Crear un "rotor" basado en los últimos resultados
-        last_results = self.historical_results[-1]['regular']
+        shift = int(self._regular_arr[-1].sum())
         
-        # Crear una transformación basada en la suma de los números anteriores
-        transformation = {}
-        for i in range(self.max_number + 1):
-            # Transformación inspirada en el rotor de Enigma
-            transformed = (i + sum(last_results)) % (self.max_number + 1)
-            transformation[i] = transformed
+        # Transformación inspirada en el rotor de Enigma: desplazar cada número
+        # según la suma de los números anteriores
+        transformation = _enigma_table(shift, self.max_number + 1)
             
         # Aplicar transformación a los resultados históricos para buscar patrones
-        transformed_results = []
-        for result in self.historical_results:
-            transformed = [transformation[num] for num in result['regular']]
-            transformed_results.append(transformed)
+        transformed_results = transformation[self._regular_arr]
+        transformed_results.flags.writeable = False  # Compartido entre llamadas
             
-        return {
+        self._enigma_cache = {
             'transformation': transformation,
             'transformed_results': transformed_results
         }
+        return dict(self._enigma_cache)
+    
+    def _most_common(self):
+        """Números regulares (10) y calientes (3) más frecuentes."""
+        if self._top_cache is None:
+            self._top_cache = (
+                _top_numbers(self._regular_counts, 10),
+                _top_numbers(self._hot_counts, 3)
+            )
+        return self._top_cache
     
     def predict_next_result(self, num_predictions=5):
         """Genera predicciones para el próximo resultado."""
-        if len(self.historical_results) < 3:
+        if self._n < 3:
             return "Se necesitan al menos 3 resultados históricos para hacer predicciones"
             
+        # Como antes, un número negativo de predicciones no genera ninguna
+        num_predictions = max(num_predictions, 0)
+        
         # Obtener análisis
-        frequency = self.analyze_frequency()
         patterns = self.analyze_patterns()
         
         # 1. Predicción basada en frecuencia
-        most_common_regular = [num for num, _ in frequency['regular'].most_common(10)]
-        most_common_hot = [num for num, _ in frequency['hot'].most_common(3)]
+        most_common_regular, most_common_hot = self._most_common()
         
         # 2. Predicción basada en patrones
-        avg_sum = sum(patterns['sum_regular']) / len(patterns['sum_regular'])
-        avg_odd_ratio = sum(patterns['odd_even_ratio']) / len(patterns['odd_even_ratio'])
+        avg_sum = patterns['sum_regular'].mean()
+        avg_odd_ratio = patterns['odd_even_ratio'].mean()
         
         # 3. Predicción basada en rango de distribución
-        avg_range = [0, 0, 0, 0]
-        for dist in patterns['range_distribution']:
-            for i in range(4):
-                avg_range[i] += dist[i]
-        avg_range = [r / len(patterns['range_distribution']) for r in avg_range]
+        avg_range = patterns['range_distribution'].mean(axis=0)
+        range_weights = np.maximum(1, (avg_range * 2).astype(int))
+        range_weights = range_weights / range_weights.sum()
         
-        # Generar predicciones combinando todos los métodos
-        predictions = []
+        # Generar predicciones combinando todos los métodos, con todos los
+        # sorteos del lote hechos de una vez
+        rng = self._rng
+        frequent_picks = rng.permuted(np.tile(most_common_regular, (num_predictions, 1)), axis=1)[:, :3]
+        range_picks = rng.choice(4, size=(num_predictions, 2), p=range_weights)
+        range_offsets = rng.random((num_predictions, 2))
+        hot = rng.choice(most_common_hot, size=num_predictions)
         
-        for _ in range(num_predictions):
-            # Equilibrar entre números frecuentes y menos frecuentes
-            candidate_numbers = set()
-            
-            # Incluir algunos números frecuentes
-            for _ in range(3):
-                if most_common_regular:
-                    candidate_numbers.add(random.choice(most_common_regular))
-            
-            # Incluir números de diferentes rangos según distribución histórica
-            nums_needed = 5 - len(candidate_numbers)
-            ranges_to_pick = []
-            for i in range(4):
-                ranges_to_pick.extend([i] * max(1, int(avg_range[i] * 2)))
-                
-            for _ in range(nums_needed):
-                if len(candidate_numbers) >= 5:
-                    break
-                    
-                # Elegir un rango basado en la distribución histórica
-                range_idx = random.choice(ranges_to_pick)
-                min_val = range_idx * 11
-                max_val = min(self.max_number, (range_idx + 1) * 11 - 1)
-                
-                attempts = 0
-                while attempts < 10:  # Evitar bucle infinito
-                    new_num = random.randint(min_val, max_val)
-                    if new_num not in candidate_numbers:
-                        candidate_numbers.add(new_num)
-                        break
-                    attempts += 1
-            
-            # Asegurarse de tener 5 números únicos
-            while len(candidate_numbers) < 5:
-                new_num = random.randint(0, self.max_number)
-                candidate_numbers.add(new_num)
-                
-            # Convertir a lista y ordenar
-            final_numbers = sorted(list(candidate_numbers)[:5])
-            
-            # Número caliente
-            hot_number = random.choice(most_common_hot) if most_common_hot else random.randint(1, self.hot_number_max)
-            
+        regular = generate_predictions(
+            frequent_picks.astype(np.int64),
+            range_picks.astype(np.int64),
+            range_offsets,
+            self.max_number
+        )
+        
+        predictions = []
+        for final_numbers, hot_number in zip(regular.tolist(), hot.tolist()):
             predictions.append({
                 'regular': final_numbers,
                 'hot': hot_number
@@ -220,19 +252,14 @@ class LotteryAnalyzer:
     
     def visualize_data(self):
         """Visualiza los datos históricos para análisis."""
-        if not self.historical_results:
+        import matplotlib.pyplot as plt
+        
+        if self._n == 0:
             return "No hay datos para visualizar"
             
-        # Frecuencia de números regulares
-        frequencies = [0] * (self.max_number + 1)
-        for result in self.historical_results:
-            for num in result['regular']:
-                frequencies[num] += 1
-                
-        # Frecuencia de números calientes
-        hot_frequencies = [0] * (self.hot_number_max + 1)
-        for result in self.historical_results:
-            hot_frequencies[result['hot']] += 1
+        # Frecuencias ya acumuladas en add_result
+        frequencies = self._regular_counts
+        hot_frequencies = self._hot_counts
             
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
         
@@ -295,8 +322,8 @@ def main():
     # Análisis de patrones
     patterns = analyzer.analyze_patterns()
     print("\nAnálisis de patrones:")
-    print(f"Promedio de suma de números regulares: {sum(patterns['sum_regular'])/len(patterns['sum_regular']):.2f}")
-    print(f"Proporción promedio de números impares: {sum(patterns['odd_even_ratio'])/len(patterns['odd_even_ratio']):.2f}")
+    print(f"Promedio de suma de números regulares: {patterns['sum_regular'].mean():.2f}")
+    print(f"Proporción promedio de números impares: {patterns['odd_even_ratio'].mean():.2f}")
     
     # Análisis inspirado en teoría del caos
     chaos = analyzer.chaos_theory_analysis()